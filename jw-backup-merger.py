@@ -1,20 +1,48 @@
 #!/usr/bin/python
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dateutil import tz
-from glob import glob
+from difflib import SequenceMatcher
+from glob import iglob
 from math import ceil
-from numpy import isnan
-from os import path, makedirs, listdir, rename, remove
-from shutil import copy2, make_archive, unpack_archive, rmtree
+from numpy import isin, isnan
+from os import path, makedirs, remove, scandir, walk
+from shutil import copyfile, copyfileobj, rmtree
+from threading import Thread
 from time import time
 from tqdm import tqdm
+from zipfile import ZipFile, ZipInfo, ZIP_STORED
 
+import hashlib
+import json
 import pandas as pd
 import sqlite3
 
+# Only available on POSIX systems
+try:
+    from os import posix_fadvise, POSIX_FADV_SEQUENTIAL
+except ImportError:
+    posix_fadvise = None
+
+# Let pandas share buffers between frames instead of taking defensive copies
+pd.set_option("mode.copy_on_write", True)
+# fillna no longer downcasts object columns behind the scenes (and warns about
+# it); the result is re-inferred explicitly where that matters. The option only
+# exists from pandas 2.2 on, and older versions never warned in the first place
+try:
+    pd.set_option("future.no_silent_downcasting", True)
+except pd.errors.OptionError:
+    pass
+
 parser = ArgumentParser()
 parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+parser.add_argument(
+    "--debug-format",
+    choices=["csv", "parquet"],
+    default="csv",
+    help="File format of the tables written in debug mode",
+)
 parser.add_argument("--folder", type=str, help="Folder containing JWL files to merge")
 parser.add_argument("--file", type=str, help="JWL file to merge", action="append")
 args = parser.parse_args()
@@ -40,11 +68,14 @@ if args.file and len(args.file) == 1 and args.folder is None:
 class JwlBackupProcessor:
     def __init__(self):
         self.app_name = "jw-backup-merger"
+        self.timezone = tz.gettz("US/Eastern")
         self.debug = args.debug
+        self.debug_format = args.debug_format
         self.merged_tables = {}
         self.primary_keys = {}
         self.foreign_keys = {}
         self.fk_constraints = {}
+        self.known_schemas = set()
         self.files_to_include_in_archive = []
         self.start_time = 0
 
@@ -54,32 +85,46 @@ class JwlBackupProcessor:
 
         self.output = {"info": [], "errors": []}
 
-    def get_primary_key_names(self, temp_db, source_cursor):
+    def read_schema(self, file_path):
+        # Runs on a worker thread, so it opens its own connection
+        temp_db = sqlite3.connect(file_path)
+        source_cursor = temp_db.cursor()
+        source_cursor.execute(
+            "SELECT type, name, sql FROM sqlite_master ORDER BY type, name;"
+        )
+        schema = tuple(source_cursor.fetchall())
+        primary_key_rows = {}
+        foreign_key_rows = {}
         for table_name in self.get_tables(temp_db):
             source_cursor.execute(
                 f"SELECT l.name FROM pragma_table_info('{table_name}') as l WHERE l.pk <>0;"
             )
-            primary_key_fetcher = source_cursor.fetchall()
+            primary_key_rows[table_name] = source_cursor.fetchall()
+            source_cursor.execute(
+                f"SELECT * FROM pragma_foreign_key_list('{table_name}');"
+            )
+            foreign_key_rows[table_name] = source_cursor.fetchall()
+        temp_db.close()
+        return schema, primary_key_rows, foreign_key_rows
+
+    def get_primary_key_names(self, primary_key_rows):
+        for table_name, primary_key_fetcher in primary_key_rows.items():
             if table_name not in self.primary_keys:
                 self.primary_keys[table_name] = []
             if len(primary_key_fetcher) > 0:
                 for primary_key_row in primary_key_fetcher:
-                    primary_key = list(primary_key_row)[0]
+                    primary_key = primary_key_row[0]
                     if primary_key and primary_key not in self.primary_keys[table_name]:
                         self.primary_keys[table_name].append(primary_key)
 
-    def get_foreign_key_names(self, temp_db, source_cursor):
-        for table_name in self.get_tables(temp_db):
-            source_cursor.execute(
-                f"SELECT * FROM pragma_foreign_key_list('{table_name}');"
-            )
-            fk_constraint_fetcher = source_cursor.fetchall()
+    def get_foreign_key_names(self, foreign_key_rows):
+        for table_name, fk_constraint_fetcher in foreign_key_rows.items():
             if len(fk_constraint_fetcher) > 0:
                 for constraints in fk_constraint_fetcher:
-                    from_table = list(constraints)[2]
-                    pk = list(constraints)[4]
+                    from_table = constraints[2]
+                    pk = constraints[4]
                     to_table = table_name
-                    fk = list(constraints)[3]
+                    fk = constraints[3]
                     if fk:
                         if from_table not in self.fk_constraints:
                             self.fk_constraints[from_table] = {}
@@ -93,26 +138,39 @@ class JwlBackupProcessor:
 
     def process_databases(self, database_files):
         self.start_time = time()
-        opened_dbs = []
         indices = []
         triggers = []
-        for file_path in tqdm(database_files, desc="Loading databases into memory"):
-            temp_db = sqlite3.connect(file_path)
-            opened_dbs.append(temp_db)
-            source_cursor = temp_db.cursor()
-            self.get_primary_key_names(temp_db, source_cursor)
-            self.get_foreign_key_names(temp_db, source_cursor)
+        # Each backup is a separate file, so their schemas can be read
+        # concurrently; they are still applied below in the order given
+        with ThreadPoolExecutor(max_workers=min(8, len(database_files))) as executor:
+            schemas = list(executor.map(self.read_schema, database_files))
+        for file_path, (schema, primary_key_rows, foreign_key_rows) in tqdm(
+            zip(database_files, schemas),
+            total=len(database_files),
+            desc="Loading databases into memory",
+        ):
+            # Backups usually share the same schema, in which case its keys,
+            # indices and triggers have already been collected
+            if schema not in self.known_schemas:
+                self.known_schemas.add(schema)
+                self.get_primary_key_names(primary_key_rows)
+                self.get_foreign_key_names(foreign_key_rows)
+                indices.extend(
+                    sql
+                    for entry_type, _, sql in schema
+                    if entry_type == "index" and sql
+                )
+                triggers.extend(
+                    sql
+                    for entry_type, _, sql in schema
+                    if entry_type == "trigger" and sql
+                )
             floor = self.get_primary_key_floor()
-            for table in self.get_tables(temp_db):
+            temp_db = sqlite3.connect(file_path)
+            for table in primary_key_rows:
                 self.load_table_into_df(temp_db, table, floor)
-            source_cursor.execute(
-                "SELECT DISTINCT sql FROM sqlite_master WHERE type='index';"
-            )
-            indices.extend([row[0] for row in source_cursor.fetchall() if row[0]])
-            source_cursor.execute(
-                "SELECT DISTINCT sql FROM sqlite_master WHERE type='trigger';"
-            )
-            triggers.extend([row[0] for row in source_cursor.fetchall() if row[0]])
+            # Everything needed from this database has been read at this point
+            temp_db.close()
 
         unique_indices = set()
         for value in indices:
@@ -156,11 +214,9 @@ class JwlBackupProcessor:
             disable=len(obsolete_tables) == 0,
         ):
             if self.debug:
-                self.merged_tables[obsolete_table].to_csv(
-                    path.join(
-                        self.working_folder,
-                        f"removed-obsolete-table-{obsolete_table}.csv",
-                    ),
+                self.save_debug_table(
+                    self.merged_tables[obsolete_table],
+                    f"removed-obsolete-table-{obsolete_table}",
                 )
             if obsolete_table in self.merged_tables:
                 self.merged_tables.pop(obsolete_table)
@@ -182,21 +238,27 @@ class JwlBackupProcessor:
             "PlaylistItem",
             "Tag",
         ]
-        for table in table_order[::-1]:
-            if table in self.merged_tables:
-                popped_table = self.merged_tables.pop(table)
-                self.merged_tables = {
-                    table: popped_table,
-                    **self.merged_tables,
-                }
+        ordered_tables = {
+            table: self.merged_tables[table]
+            for table in table_order
+            if table in self.merged_tables
+        }
+        ordered_tables.update(
+            {
+                table: table_data
+                for table, table_data in self.merged_tables.items()
+                if table not in ordered_tables
+            }
+        )
+        self.merged_tables = ordered_tables
 
         if self.debug:
             for table_name in tqdm(
                 self.merged_tables.keys(),
-                desc="Outputting concatenated tables to CSV for debugging",
+                desc="Outputting concatenated tables for debugging",
             ):
-                self.merged_tables[table_name].to_csv(
-                    path.join(self.working_folder, f"concat-{table_name}.csv"),
+                self.save_debug_table(
+                    self.merged_tables[table_name], f"concat-{table_name}"
                 )
         print()
 
@@ -204,36 +266,17 @@ class JwlBackupProcessor:
             self.merged_tables.keys(),
             desc=f"Removing identical entries from concatenated tables",
         ):
-            if len(list(self.merged_tables[table_name].columns)) == 1:
-                unique_subset = self.merged_tables[table_name].columns.to_list()
-                current_table_pk_name = self.merged_tables[table_name].columns[0]
-            else:
-                current_table_pk_name = self.primary_keys[table_name][0]
-                unique_subset = [
-                    x
-                    for x in self.merged_tables[table_name].columns
-                    if x != current_table_pk_name
-                    and not (table_name == "Location" and x == "Title")
-                ]
-            grouped = (
-                self.merged_tables[table_name]
-                .groupby(unique_subset)[current_table_pk_name]
-                .apply(list)
-            )
-            filtered_grouped = grouped[grouped.apply(len) > 1]
-            desired_result = {values[0]: values[1:] for values in filtered_grouped}
-            replacement_dict = {}
-            for orig, duplicate_values in desired_result.items():
-                for duplicate_value in duplicate_values:
-                    replacement_dict[duplicate_value] = orig
+            (
+                current_table_pk_name,
+                replacement_dict,
+            ) = self.get_identical_entries_replacement_dict(table_name)
             self.update_primary_and_foreign_keys(
                 table_name, current_table_pk_name, replacement_dict
             )
             if self.debug:
-                self.merged_tables[table_name].to_csv(
-                    path.join(
-                        self.working_folder, f"deduplicated-1st-pass-{table_name}.csv"
-                    ),
+                self.save_debug_table(
+                    self.merged_tables[table_name],
+                    f"deduplicated-1st-pass-{table_name}",
                 )
 
         unique_constraints_requiring_attention = {
@@ -278,38 +321,27 @@ class JwlBackupProcessor:
         ):
             if table in self.merged_tables:
                 for subset in subsets:
+                    table_data = self.merged_tables[table]
                     if table == "Note":
-                        self.merged_tables[table].sort_values(
-                            "LastModified", ascending=False, inplace=True
+                        table_data = table_data.sort_values(
+                            "LastModified", ascending=False
                         )
                     elif table == "TagMap":
-                        self.merged_tables[table].sort_values(
-                            "Position", ascending=False, inplace=True
-                        )
+                        table_data = table_data.sort_values("Position", ascending=False)
                     else:
-                        self.merged_tables[table].sort_values(subset, inplace=True)
-                    mask = (
-                        ~self.merged_tables[table][subset]
-                        .apply(lambda x: x == "")
-                        .any(axis=1)
-                    )
-                    duplicate_values_mask = self.merged_tables[table][mask].duplicated(
-                        subset=subset, keep=False
-                    )
-                    duplicates = self.merged_tables[table][mask][duplicate_values_mask]
+                        table_data = table_data.sort_values(subset)
+                    self.merged_tables[table] = table_data
+                    mask = ~table_data[subset].apply(lambda x: x == "").any(axis=1)
                     primary_key = self.primary_keys[table][0]
-                    # TODO: find a better way to handle this, using groupby instead?
-                    collision_replacement_dict = {}
-                    for _, row in duplicates.iterrows():
-                        primary_key_value = row[self.primary_keys[table][0]]
-                        key = tuple(row[subset])
-
-                        if key not in collision_replacement_dict:
-                            collision_replacement_dict[key] = [primary_key_value]
-                        else:
-                            collision_replacement_dict[key].append(primary_key_value)
+                    # Hash the subset only once; sort=False keeps the rows in the
+                    # order sorted above, so the first key of each group is kept
+                    collision_groups = (
+                        table_data[mask]
+                        .groupby(subset, sort=False, dropna=False)[primary_key]
+                        .agg(list)
+                    )
                     collision_replacement_dict = {
-                        v[0]: v[1:] for v in collision_replacement_dict.values()
+                        v[0]: v[1:] for v in collision_groups if len(v) > 1
                     }
                     collision_pair_replacement_dict = {}
                     for key, values in collision_replacement_dict.items():
@@ -319,40 +351,42 @@ class JwlBackupProcessor:
                     if len(collision_pair_replacement_dict.keys()) == 0:
                         continue
                     if table in text_values_to_merge.keys():
+                        # Map each key to its row once, instead of scanning the
+                        # whole table twice for every colliding pair
+                        row_indices = {}
+                        for row_index, key in zip(
+                            table_data.index, table_data[primary_key]
+                        ):
+                            row_indices.setdefault(key, row_index)
                         for (
                             old_primary_key,
                             new_primary_key,
                         ) in collision_pair_replacement_dict.items():
-                            old_row = self.merged_tables[table].loc[
-                                self.merged_tables[table][primary_key]
-                                == old_primary_key
-                            ]
-                            old_row_index = old_row.index[0]
-                            new_row = self.merged_tables[table].loc[
-                                self.merged_tables[table][primary_key]
-                                == new_primary_key
-                            ]
-                            new_row_index = new_row.index[0]
+                            old_row_index = row_indices[old_primary_key]
+                            new_row_index = row_indices[new_primary_key]
                             for text_column in text_values_to_merge[table]:
-                                old_row_text_value = old_row[text_column].values[0]
-                                new_row_text_value = new_row[text_column].values[0]
+                                old_row_text_value = table_data.at[
+                                    old_row_index, text_column
+                                ]
+                                new_row_text_value = table_data.at[
+                                    new_row_index, text_column
+                                ]
                                 if (
                                     len(old_row_text_value) > 0
                                     and old_row_text_value.strip()
                                     != new_row_text_value.strip()
                                 ):
-                                    if old_row_text_value in new_row_text_value:
-                                        new_value = new_row_text_value
-                                    else:
-                                        new_value = self.inline_diff(
+                                    # Only write when the text actually changes;
+                                    # with copy-on-write, a write can force the
+                                    # column to be copied first
+                                    if old_row_text_value not in new_row_text_value:
+                                        table_data.at[
+                                            new_row_index, text_column
+                                        ] = self.inline_diff(
                                             old_row_text_value, new_row_text_value
                                         )
-                                    self.merged_tables[table].at[
-                                        new_row_index, text_column
-                                    ] = new_value
-                            self.merged_tables[table].drop(
-                                index=old_row_index, inplace=True
-                            )
+                            table_data = table_data.drop(index=old_row_index)
+                        self.merged_tables[table] = table_data
                     else:
                         self.update_primary_key(
                             table, primary_key, collision_pair_replacement_dict
@@ -366,49 +400,56 @@ class JwlBackupProcessor:
         filter_condition = None
         for table, field in self.fk_constraints["Location"]["LocationId"]:
             # Initialize a temporary condition for the current key
-            temp_condition = ~self.merged_tables["Location"]["LocationId"].isin(
-                self.merged_tables[table][field]
+            temp_condition = ~isin(
+                self.get_key_values("Location", "LocationId"),
+                self.get_key_values(table, field),
             )
             if filter_condition is None:
                 filter_condition = temp_condition
             else:
                 filter_condition &= temp_condition
 
-        orphan_locations = self.merged_tables["Location"][filter_condition]
-        for index, row in tqdm(
-            orphan_locations.iterrows(),
-            desc="Removing locations that are no longer referenced anywhere",
-            disable=len(orphan_locations) == 0,
-        ):
-            self.merged_tables["Location"].drop(index, inplace=True)
+        orphan_locations_length = int(filter_condition.sum())
+        if orphan_locations_length > 0:
+            progress_bar = tqdm(
+                total=orphan_locations_length,
+                desc="Removing locations that are no longer referenced anywhere",
+            )
+            self.merged_tables["Location"] = self.merged_tables["Location"].loc[
+                ~filter_condition
+            ]
+            progress_bar.update(orphan_locations_length)
+            progress_bar.close()
 
         # Remove notes that are empty and aren't referenced by TagMap table
         if "Note" in self.merged_tables:
-            empty_notes = self.merged_tables["Note"][
-                (
-                    self.merged_tables["Note"]["Title"].isnull()
-                    | (self.merged_tables["Note"]["Title"] == "")
-                )
-                & (
-                    self.merged_tables["Note"]["Content"].isnull()
-                    | (self.merged_tables["Note"]["Content"] == "")
-                )
+            note = self.merged_tables["Note"]
+            title = note["Title"]
+            content = note["Content"]
+            empty_notes = note[
+                (title.isnull() | (title == "")) & (content.isnull() | (content == ""))
             ]
             untagged_empty_notes = empty_notes[
-                ~empty_notes["NoteId"].isin(self.merged_tables["TagMap"]["NoteId"])
+                ~isin(
+                    pd.to_numeric(empty_notes["NoteId"], errors="coerce"),
+                    self.get_key_values("TagMap", "NoteId"),
+                )
             ]
-            for index, row in tqdm(
-                untagged_empty_notes.iterrows(),
-                desc="Removing untagged and empty notes",
-                disable=len(untagged_empty_notes) == 0,
-            ):
-                self.merged_tables["Note"].drop(index, inplace=True)
-                # Remove references in other tables to this note
-                self.remove_foreign_key_value(
+            self.merged_tables["Note"] = note.drop(untagged_empty_notes.index)
+            untagged_empty_notes_length = len(untagged_empty_notes)
+            if untagged_empty_notes_length > 0:
+                progress_bar = tqdm(
+                    total=untagged_empty_notes_length,
+                    desc="Removing untagged and empty notes",
+                )
+                # Remove references in other tables to these notes
+                self.remove_foreign_key_values(
                     "Note",
                     self.primary_keys["Note"][0],
-                    row[self.primary_keys["Note"][0]],
+                    untagged_empty_notes[self.primary_keys["Note"][0]],
                 )
+                progress_bar.update(untagged_empty_notes_length)
+                progress_bar.close()
 
         # Remove entries from IndependentMedia that aren't referenced by PlaylistItemIndependentMediaMap table
         if (
@@ -416,24 +457,30 @@ class JwlBackupProcessor:
             and "PlaylistItemIndependentMediaMap" in self.merged_tables
         ):
             orphan_independent_media = self.merged_tables["IndependentMedia"][
-                ~self.merged_tables["IndependentMedia"]["IndependentMediaId"].isin(
-                    self.merged_tables["PlaylistItemIndependentMediaMap"][
-                        "IndependentMediaId"
-                    ]
+                ~isin(
+                    self.get_key_values("IndependentMedia", "IndependentMediaId"),
+                    self.get_key_values(
+                        "PlaylistItemIndependentMediaMap", "IndependentMediaId"
+                    ),
                 )
             ]
-            for index, row in tqdm(
-                orphan_independent_media.iterrows(),
-                desc="Removing references to unneeded media",
-                disable=len(orphan_independent_media) == 0,
-            ):
-                self.merged_tables["IndependentMedia"].drop(index, inplace=True)
-                # Remove references in other tables to this note
-                self.remove_foreign_key_value(
+            self.merged_tables["IndependentMedia"] = self.merged_tables[
+                "IndependentMedia"
+            ].drop(orphan_independent_media.index)
+            orphan_independent_media_length = len(orphan_independent_media)
+            if orphan_independent_media_length > 0:
+                progress_bar = tqdm(
+                    total=orphan_independent_media_length,
+                    desc="Removing references to unneeded media",
+                )
+                # Remove references in other tables to this media
+                self.remove_foreign_key_values(
                     "IndependentMedia",
                     self.primary_keys["IndependentMedia"][0],
-                    row[self.primary_keys["IndependentMedia"][0]],
+                    orphan_independent_media[self.primary_keys["IndependentMedia"][0]],
                 )
+                progress_bar.update(orphan_independent_media_length)
+                progress_bar.close()
 
         # Remove entries in UserMark if their LocationId does not exist in Location table
         if "UserMark" in self.merged_tables:
@@ -443,8 +490,9 @@ class JwlBackupProcessor:
                 how="left",
                 indicator=True,
             )
+            usermark_is_referenced = usermarks_and_locations["_merge"] == "both"
             orphan_usermarks_length = len(
-                usermarks_and_locations[usermarks_and_locations["_merge"] != "both"]
+                usermarks_and_locations[~usermark_is_referenced]
             )
             if orphan_usermarks_length > 0:
                 progress_bar = tqdm(
@@ -452,7 +500,7 @@ class JwlBackupProcessor:
                     desc="Removing overlapping highlights",
                 )
                 self.merged_tables["UserMark"] = usermarks_and_locations[
-                    usermarks_and_locations["_merge"] == "both"
+                    usermark_is_referenced
                 ].drop(columns=["_merge"])
                 progress_bar.update(orphan_usermarks_length)
                 progress_bar.close()
@@ -465,8 +513,9 @@ class JwlBackupProcessor:
                 how="left",
                 indicator=True,
             )
+            blockrange_is_referenced = blockranges_and_usermarks["_merge"] == "both"
             orphan_blockranges_length = len(
-                blockranges_and_usermarks[blockranges_and_usermarks["_merge"] != "both"]
+                blockranges_and_usermarks[~blockrange_is_referenced]
             )
             if orphan_blockranges_length > 0:
                 progress_bar = tqdm(
@@ -474,7 +523,7 @@ class JwlBackupProcessor:
                     desc="Removing references to deleted highlights",
                 )
                 self.merged_tables["BlockRange"] = blockranges_and_usermarks[
-                    blockranges_and_usermarks["_merge"] == "both"
+                    blockrange_is_referenced
                 ].drop(columns=["_merge"])
                 progress_bar.update(orphan_blockranges_length)
                 progress_bar.close()
@@ -513,8 +562,8 @@ class JwlBackupProcessor:
 
         if "TagMap" in self.merged_tables:
             tag_map_len = len(self.merged_tables["TagMap"])
-            self.merged_tables["TagMap"].sort_values(
-                ["TagId", "Position"], inplace=True
+            self.merged_tables["TagMap"] = self.merged_tables["TagMap"].sort_values(
+                ["TagId", "Position"]
             )
             progress_bar = tqdm(
                 total=tag_map_len,
@@ -529,26 +578,24 @@ class JwlBackupProcessor:
         print()
 
         for table in tqdm(self.merged_tables, desc="Re-indexing all tables"):
+            table_data = self.merged_tables[table]
             if (
                 table not in self.primary_keys
-                or len(list(self.merged_tables[table].columns)) == 1
+                or len(table_data.columns) == 1
                 or len(self.primary_keys[table]) > 1
             ):
                 continue
-            self.merged_tables[table].reset_index(drop=True, inplace=True)
+            primary_key = self.primary_keys[table][0]
+            self.merged_tables[table] = table_data.reset_index(drop=True)
             new_pk_dict = {
-                row[self.primary_keys[table][0]]: index + 1
-                for index, row in self.merged_tables[table].iterrows()
+                value: index + 1 for index, value in enumerate(table_data[primary_key])
             }
             self.update_primary_and_foreign_keys(
                 table,
-                self.primary_keys[table][0],
+                primary_key,
                 new_pk_dict,
             )
 
-        for opened_db in opened_dbs:
-            opened_db.close()
-
         try:
             independent_media_files = (
                 self.merged_tables["IndependentMedia"]["FilePath"].dropna().tolist()
@@ -569,10 +616,33 @@ class JwlBackupProcessor:
 
         self.save_merged_tables(indices, triggers)
 
+    def get_identical_entries_replacement_dict(self, table_name):
+        table_data = self.merged_tables[table_name]
+        if len(table_data.columns) == 1:
+            unique_subset = table_data.columns.to_list()
+            current_table_pk_name = table_data.columns[0]
+        else:
+            current_table_pk_name = self.primary_keys[table_name][0]
+            unique_subset = [
+                x
+                for x in table_data.columns
+                if x != current_table_pk_name
+                and not (table_name == "Location" and x == "Title")
+            ]
+        grouped = table_data.groupby(unique_subset)[current_table_pk_name].apply(list)
+        filtered_grouped = grouped[grouped.apply(len) > 1]
+        desired_result = {values[0]: values[1:] for values in filtered_grouped}
+        replacement_dict = {}
+        for orig, duplicate_values in desired_result.items():
+            for duplicate_value in duplicate_values:
+                replacement_dict[duplicate_value] = orig
+        return current_table_pk_name, replacement_dict
+
     def inline_diff(self, a, b):
-        import difflib
+        if a == b:
+            return a
 
-        matcher = difflib.SequenceMatcher(None, a, b)
+        matcher = SequenceMatcher(None, a, b)
 
         def process_tag(tag, i1, i2, j1, j2):
             if tag == "replace":
@@ -587,6 +657,18 @@ class JwlBackupProcessor:
 
         return "".join(process_tag(*t) for t in matcher.get_opcodes())
 
+    def save_debug_table(self, table_data, file_name):
+        file_path = path.join(self.working_folder, f"{file_name}.{self.debug_format}")
+        if self.debug_format == "parquet":
+            # Columns mixing numbers and empty strings (see fillna("")) can't be
+            # stored as-is in a columnar file, so write them out as text
+            object_columns = table_data.select_dtypes(include="object").columns
+            table_data.astype({column: str for column in object_columns}).to_parquet(
+                file_path
+            )
+        else:
+            table_data.to_csv(file_path)
+
     def update_primary_and_foreign_keys(
         self,
         origin_table,
@@ -610,20 +692,22 @@ class JwlBackupProcessor:
         origin_primary_key,
         replacement_dict,
     ):
-        # Update primary key
-        self.merged_tables[origin_table][origin_primary_key] = self.merged_tables[
-            origin_table
-        ][origin_primary_key].map(lambda x: replacement_dict.get(x, x))
+        # Update primary key; most tables have nothing to replace, so skip
+        # mapping every value through the empty dict
+        if replacement_dict:
+            self.merged_tables[origin_table][origin_primary_key] = self.merged_tables[
+                origin_table
+            ][origin_primary_key].map(lambda x: replacement_dict.get(x, x))
         subset = list(self.merged_tables[origin_table].columns)
         if origin_table == "Location":
             subset.remove("Title")
-            self.merged_tables[origin_table].sort_values(
-                "Title", ascending=False, inplace=True
-            )
+            self.merged_tables[origin_table] = self.merged_tables[
+                origin_table
+            ].sort_values("Title", ascending=False)
         # Drop duplicates resulting from primary key change
-        self.merged_tables[origin_table].drop_duplicates(
-            subset=subset, ignore_index=True, inplace=True
-        )
+        self.merged_tables[origin_table] = self.merged_tables[
+            origin_table
+        ].drop_duplicates(subset=subset, ignore_index=True)
 
     def update_foreign_keys(
         self,
@@ -635,25 +719,32 @@ class JwlBackupProcessor:
             for rel_table, fk in self.fk_constraints[origin_table][origin_primary_key]:
                 if rel_table in self.merged_tables:
                     # Update foreign key
-                    self.merged_tables[rel_table][fk] = self.merged_tables[rel_table][
-                        fk
-                    ].map(lambda x: replacement_dict.get(x, x))
+                    if replacement_dict:
+                        self.merged_tables[rel_table][fk] = self.merged_tables[
+                            rel_table
+                        ][fk].map(lambda x: replacement_dict.get(x, x))
                     # Drop duplicates resulting from foreign key change
-                    self.merged_tables[rel_table].drop_duplicates(
-                        ignore_index=True, inplace=True
-                    )
+                    self.merged_tables[rel_table] = self.merged_tables[
+                        rel_table
+                    ].drop_duplicates(ignore_index=True)
 
-    def remove_foreign_key_value(self, table, foreign_key, value):
+    def remove_foreign_key_values(self, table, foreign_key, values):
+        # Filter each referencing table once for all the removed keys, rather
+        # than once per key
         if table in self.fk_constraints:
             for rel_table, fk in self.fk_constraints[table][foreign_key]:
-                rows_to_remove = self.merged_tables[rel_table][
-                    self.merged_tables[rel_table][fk] == value
-                ]
-                if len(rows_to_remove) > 0:
-                    self.merged_tables[rel_table].drop(
-                        rows_to_remove.index,
-                        inplace=True,
-                    )
+                rows_to_remove = self.merged_tables[rel_table][fk].isin(values)
+                if rows_to_remove.any():
+                    self.merged_tables[rel_table] = self.merged_tables[rel_table][
+                        ~rows_to_remove
+                    ]
+
+    def get_key_values(self, table, column):
+        # Missing keys are stored as "" (see fillna("")), which leaves key columns
+        # with an object dtype; compare them as numbers so lookups use typed arrays
+        return pd.to_numeric(
+            self.merged_tables[table][column], errors="coerce"
+        ).to_numpy()
 
     def get_tables(self, db):
         cursor = db.cursor()
@@ -671,7 +762,6 @@ class JwlBackupProcessor:
         return floor
 
     def load_table_into_df(self, db, table_name, floor):
-        new_table = pd.read_sql(f"SELECT * FROM {table_name}", db)
         foreign_key_list = [
             value for values_list in self.foreign_keys.values() for value in values_list
         ]
@@ -680,37 +770,55 @@ class JwlBackupProcessor:
             for values in self.primary_keys.values()
             if values and values[0].endswith("Id")
         ]
-        key_list = sorted(list(set(primary_key_list + foreign_key_list)))
+        key_list = sorted(set(primary_key_list + foreign_key_list))
+        columns = [
+            row[0]
+            for row in db.execute(
+                f"SELECT l.name FROM pragma_table_info('{table_name}') as l;"
+            )
+        ]
+        if table_name in self.merged_tables and len(columns) != 1:
+            # Let SQLite shift the numeric keys past the floor while reading the
+            # rows, instead of offsetting every cell in Python afterwards
+            select_list = ", ".join(
+                f'CASE WHEN typeof("{column}") IN (\'integer\', \'real\') THEN "{column}" + :floor ELSE "{column}" END AS "{column}"'
+                if column in key_list
+                else f'"{column}"'
+                for column in columns
+            )
+        else:
+            select_list = "*"
+        new_table = pd.read_sql(
+            f"SELECT {select_list} FROM {table_name}", db, params={"floor": floor}
+        )
         if table_name not in self.merged_tables:
             self.merged_tables[table_name] = new_table
         else:
-            if len(list(new_table.columns)) != 1:
-                for column in new_table.columns:
-                    if column in key_list and len(new_table[column]) > 0:
-                        new_table[column] = new_table[column].apply(
-                            lambda x: x + floor if isinstance(x, (int, float)) else x
-                        )
             self.merged_tables[table_name] = pd.concat(
                 [self.merged_tables[table_name], new_table],
                 ignore_index=True,
             )
-            self.merged_tables[table_name].reset_index(drop=True, inplace=True)
+            self.merged_tables[table_name] = self.merged_tables[table_name].reset_index(
+                drop=True
+            )
 
         # Make sure that some needed values in Note table are not empty
         if table_name == "Note":
-            if "Created" not in self.merged_tables[table_name]:
-                self.merged_tables[table_name]["Created"] = self.merged_tables[
-                    table_name
-                ]["LastModified"]
-            self.merged_tables[table_name]["LastModified"] = (
-                self.merged_tables[table_name]["LastModified"]
-                .fillna(self.merged_tables[table_name]["Created"])
-                .fillna(datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"))
+            note = self.merged_tables[table_name]
+            now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+            if "Created" not in note:
+                note["Created"] = note["LastModified"]
+            note["LastModified"] = (
+                note["LastModified"]
+                .fillna(note["Created"])
+                .fillna(now)
+                .infer_objects(copy=False)
             )
-            self.merged_tables[table_name]["Created"] = (
-                self.merged_tables[table_name]["Created"]
-                .fillna(self.merged_tables[table_name]["LastModified"])
-                .fillna(datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"))
+            note["Created"] = (
+                note["Created"]
+                .fillna(note["LastModified"])
+                .fillna(now)
+                .infer_objects(copy=False)
             )
 
         # Remove columns no longer used in certain tables in latest schema (v14)
@@ -728,24 +836,42 @@ class JwlBackupProcessor:
             if table_name == table_to_check:
                 for column in obsolete_columns:
                     if column in self.merged_tables[table_name].columns:
-                        self.merged_tables[table_name].drop(
-                            column, axis=1, inplace=True
-                        )
-        self.merged_tables[table_name].fillna("", inplace=True)
+                        self.merged_tables[table_name] = self.merged_tables[
+                            table_name
+                        ].drop(column, axis=1)
+        self.merged_tables[table_name] = (
+            self.merged_tables[table_name].fillna("").infer_objects(copy=False)
+        )
 
     def save_merged_tables(self, indices, triggers):
         makedirs(self.working_folder, exist_ok=True)
 
-        conn_merged = sqlite3.connect(self.merged_db_path)
+        # Transactions are managed explicitly below
+        conn_merged = sqlite3.connect(self.merged_db_path, isolation_level=None)
         dest_cursor = conn_merged.cursor()
 
+        # The merged database is a scratch copy until it is zipped up, so skip
+        # the on-disk journal and the fsyncs; the final VACUUM still leaves a
+        # regular file behind
+        dest_cursor.execute("PRAGMA journal_mode = MEMORY;")
+        dest_cursor.execute("PRAGMA synchronous = OFF;")
+        dest_cursor.execute("PRAGMA temp_store = MEMORY;")
+        dest_cursor.execute("PRAGMA cache_size = -200000;")
+        # Nothing else opens the file while it is rebuilt, so take the lock once
+        # and read it through a memory map
+        dest_cursor.execute("PRAGMA locking_mode = EXCLUSIVE;")
+        dest_cursor.execute("PRAGMA mmap_size = 268435456;")
+
+        # Rebuild the whole database in one transaction, so that the schema
+        # changes and every insert share a single commit
+        dest_cursor.execute("BEGIN IMMEDIATE;")
+
         dest_cursor.execute("SELECT name FROM sqlite_master WHERE type='trigger';")
         trigger_names = dest_cursor.fetchall()
 
         for trigger_name in trigger_names:
             trigger_name = trigger_name[0]
             dest_cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name};")
-        conn_merged.commit()
 
         dest_cursor.execute("SELECT name FROM sqlite_master WHERE type='index';")
         index_names = dest_cursor.fetchall()
@@ -754,28 +880,31 @@ class JwlBackupProcessor:
             index_name = index_name[0]
             if not index_name.startswith("sqlite_"):
                 dest_cursor.execute(f"DROP INDEX IF EXISTS {index_name};")
-        conn_merged.commit()
 
+        # With the triggers gone, an unfiltered DELETE lets SQLite truncate each
+        # table by freeing its pages instead of deleting row by row
         for table_name in tqdm(
             self.merged_tables.keys(),
             desc="Emptying existing database",
         ):
             dest_cursor.execute(f"DELETE FROM {table_name};")
-            conn_merged.commit()
 
         dest_cursor.execute(
             "INSERT OR REPLACE INTO LastModified (LastModified) VALUES (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'));"
         )
 
+        # Unique indices have to be in place to reject conflicting rows, but
+        # plain ones are quicker to build in one go once the data is in
+        deferred_indices = []
         for index_sql in indices:
-            dest_cursor.execute(index_sql)
+            if index_sql.upper().startswith("CREATE UNIQUE"):
+                dest_cursor.execute(index_sql)
+            else:
+                deferred_indices.append(index_sql)
 
         for trigger_sql in triggers:
             dest_cursor.execute(trigger_sql)
 
-        conn_merged.commit()
-        dest_cursor.execute("VACUUM")
-        conn_merged.commit()
         for table_name, table_data in tqdm(
             self.merged_tables.items(), desc="Inserting fresh data into database"
         ):
@@ -783,17 +912,23 @@ class JwlBackupProcessor:
                 continue
 
             insert_sql = f"INSERT INTO {table_name} ({', '.join(table_data.columns)}) VALUES ({', '.join(['?'] * len(table_data.columns))})"
-            rows_to_insert = []
-
-            for row in table_data.values:
-                cleaned_row = [
-                    None
-                    if cell == ""
-                    and not any(keyword in col_name for keyword in ["Text", "Value"])
-                    else (int(cell) if str(cell).isnumeric() else cell)
-                    for col_name, cell in zip(table_data.columns, row)
-                ]
-                rows_to_insert.append(tuple(cleaned_row))
+            # Clean the values column by column, so that whether a column keeps
+            # empty strings is only worked out once, then zip the columns back
+            # into row tuples
+            cleaned_columns = []
+            for col_name in table_data.columns:
+                keeps_empty_strings = any(
+                    keyword in col_name for keyword in ["Text", "Value"]
+                )
+                cleaned_columns.append(
+                    [
+                        None
+                        if cell == "" and not keeps_empty_strings
+                        else (int(cell) if str(cell).isnumeric() else cell)
+                        for cell in table_data[col_name].tolist()
+                    ]
+                )
+            rows_to_insert = list(zip(*cleaned_columns))
 
             try:
                 dest_cursor.executemany(insert_sql, rows_to_insert)
@@ -805,16 +940,16 @@ class JwlBackupProcessor:
                 self.output["errors"].append((table_name, insert_sql, e))
             if self.debug or len(self.output["errors"]) > 0:
                 try:
-                    table_data.to_csv(
-                        path.join(
-                            self.working_folder,
-                            f"final_{table_name}.csv",
-                        )
-                    )
+                    self.save_debug_table(table_data, f"final_{table_name}")
                 except Exception:
-                    print(f"Could not save {table_name}.csv; continuing...")
+                    print(
+                        f"Could not save {table_name}.{self.debug_format}; continuing..."
+                    )
+
+        for index_sql in deferred_indices:
+            dest_cursor.execute(index_sql)
 
-        conn_merged.commit()
+        dest_cursor.execute("COMMIT;")
 
         print()
 
@@ -842,108 +977,111 @@ class JwlBackupProcessor:
             else:
                 print(self.output["errors"])
 
+        # Rewrite the file only once, now that everything has been committed
         dest_cursor.execute("VACUUM")
-        conn_merged.commit()
         conn_merged.close()
 
     def createJwlFile(self):
-        merged_dir = path.join(self.working_folder, "merged")
-        manifest_file_path = path.join(merged_dir, "manifest.json")
-        all_unzip_folder_names = list(
-            directory
-            for directory in listdir(self.working_folder)
-            if directory != "merged"
-            and path.isdir(path.join(self.working_folder, directory))
-        )
+        with scandir(self.working_folder) as entries:
+            all_unzip_folder_names = [
+                entry.name for entry in entries if entry.is_dir(follow_symlinks=False)
+            ]
         first_jwl_unzip_folder_name = all_unzip_folder_names[0]
         first_jwl_unzip_folder_path = path.join(
             self.working_folder, first_jwl_unzip_folder_name
         )
 
-        makedirs(merged_dir, exist_ok=True)
-
-        for file_name in tqdm(
-            listdir(first_jwl_unzip_folder_path), desc="Adding base files to archive"
-        ):
-            if file_name.endswith(".png") or file_name.endswith(".json"):
-                copy2(path.join(first_jwl_unzip_folder_path, file_name), merged_dir)
-        for i in range(len(self.files_to_include_in_archive)):
-            if not path.exists(self.files_to_include_in_archive[i]):
-                file_path = glob(
-                    path.join(
-                        self.working_folder, "**", self.files_to_include_in_archive[i]
-                    ),
-                    recursive=True,
-                )
-                if file_path:
-                    self.files_to_include_in_archive[i] = path.join(
-                        path.dirname(file_path[0]),
-                        self.files_to_include_in_archive[i],
-                    )
-
-        for file_to_include_in_archive in tqdm(
-            self.files_to_include_in_archive,
-            desc="Adding additional media files to archive",
-            disable=len(self.files_to_include_in_archive) == 0,
-        ):
-            if file_to_include_in_archive != path.join(
-                merged_dir, path.basename(file_to_include_in_archive)
-            ):
-                copy2(file_to_include_in_archive, merged_dir)
-
-        import json
-
-        with open(manifest_file_path, "r") as file:
+        with open(path.join(first_jwl_unzip_folder_path, "manifest.json"), "r") as file:
             manifest_data = json.load(file)
 
-        database_file_path = path.join(
-            merged_dir, manifest_data["userDataBackup"]["databaseName"]
-        )
-        copy2(
-            self.merged_db_path,
-            database_file_path,
-        )
-
         current_datetime = datetime.now()
-        formatted_date = current_datetime.astimezone(tz.gettz("US/Eastern")).strftime(
+        formatted_date = current_datetime.astimezone(self.timezone).strftime(
             "%Y-%m-%dT%H:%M:%S%z"
         )
-        manifest_data["creationDate"] = formatted_date
-
         name_timestamp = current_datetime.strftime("%Y-%m-%d-%H%M%S")
         merged_file_name = f"UserdataBackup_{name_timestamp}_{self.app_name}.jwlibrary"
 
-        manifest_data["name"] = self.app_name
-
-        userDataBackup = {
-            "lastModifiedDate": formatted_date,
-            "hash": self.calculate_sha256(database_file_path),
-            "databaseName": manifest_data["userDataBackup"]["databaseName"],
-            "schemaVersion": manifest_data["userDataBackup"]["schemaVersion"],
-            "deviceName": self.app_name,
-        }
-        manifest_data["userDataBackup"] = userDataBackup
-
-        with open(manifest_file_path, "w") as file:
-            json.dump(manifest_data, file, indent=2)
-
         makedirs(self.jwl_output_folder, exist_ok=True)
 
-        make_archive(
-            path.join(self.jwl_output_folder, merged_file_name),
-            "zip",
-            merged_dir,
-        )
-
         output_jwl_file_path = path.abspath(
             path.join(self.jwl_output_folder, merged_file_name)
         )
-        rename(
-            output_jwl_file_path + ".zip",
-            output_jwl_file_path,
-        )
 
-        processor.cleanTempFiles()
+        # The manifest is rewritten below, so only the other base files are
+        # taken from the first backup as-is
+        with scandir(first_jwl_unzip_folder_path) as entries:
+            base_files = [
+                entry
+                for entry in entries
+                if entry.is_file()
+                and entry.name != "manifest.json"
+                and entry.name.endswith((".png", ".json"))
+            ]
+        # Bind the path helpers once, as the loops below run per media file
+        join, basename, exists = path.join, path.basename, path.exists
+        # Walk the extracted backups once, rather than searching the whole
+        # working folder again for every media file
+        extracted_file_paths = {}
+        for folder_path, _, file_names in walk(self.working_folder):
+            for file_name in file_names:
+                extracted_file_paths.setdefault(file_name, join(folder_path, file_name))
+        self.files_to_include_in_archive = [
+            file_path
+            if exists(file_path)
+            else extracted_file_paths.get(file_path, file_path)
+            for file_path in self.files_to_include_in_archive
+        ]
+
+        # Write everything straight into the archive instead of staging it in
+        # a merged folder first. Images and the SQLite database barely shrink
+        # when deflated, so store them as-is instead of spending time
+        # compressing them
+        with ZipFile(
+            output_jwl_file_path, "w", ZIP_STORED, allowZip64=True
+        ) as jwl_file:
+            archived_file_names = set()
+            for base_file in tqdm(base_files, desc="Adding base files to archive"):
+                jwl_file.write(base_file.path, arcname=base_file.name)
+                archived_file_names.add(base_file.name)
+
+            for file_to_include_in_archive in tqdm(
+                self.files_to_include_in_archive,
+                desc="Adding additional media files to archive",
+                disable=len(self.files_to_include_in_archive) == 0,
+            ):
+                file_name = basename(file_to_include_in_archive)
+                if file_name not in archived_file_names:
+                    self.archive_media_file(
+                        jwl_file, file_to_include_in_archive, file_name
+                    )
+                    archived_file_names.add(file_name)
+
+            database_name = manifest_data["userDataBackup"]["databaseName"]
+            # The database is only a few megabytes, so read it once and hash the
+            # buffer on a worker thread while it is written into the archive
+            with open(self.merged_db_path, "rb") as database_file:
+                database_bytes = database_file.read()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                database_hash = executor.submit(
+                    lambda: hashlib.sha256(database_bytes).hexdigest()
+                )
+                jwl_file.writestr(database_name, database_bytes)
+
+            manifest_data["creationDate"] = formatted_date
+            manifest_data["name"] = self.app_name
+
+            userDataBackup = {
+                "lastModifiedDate": formatted_date,
+                "hash": database_hash.result(),
+                "databaseName": database_name,
+                "schemaVersion": manifest_data["userDataBackup"]["schemaVersion"],
+                "deviceName": self.app_name,
+            }
+            manifest_data["userDataBackup"] = userDataBackup
+
+            jwl_file.writestr("manifest.json", json.dumps(manifest_data, indent=2))
+
+        processor.cleanTempFiles(background=True)
 
         print()
         end_time = time()
@@ -957,25 +1095,52 @@ class JwlBackupProcessor:
         print()
         return output_jwl_file_path
 
-    def cleanTempFiles(self, force=False):
+    def archive_media_file(self, jwl_file, source_path, arcname):
+        # Media files are read once from start to end, so let the kernel read
+        # ahead where it supports the hint, and copy them in large chunks
+        # rather than the 8 KiB ZipFile.write uses
+        with open(source_path, "rb") as source:
+            if posix_fadvise is not None:
+                posix_fadvise(source.fileno(), 0, 0, POSIX_FADV_SEQUENTIAL)
+            zip_info = ZipInfo.from_file(source_path, arcname)
+            with jwl_file.open(zip_info, "w") as destination:
+                copyfileobj(source, destination, 1024 * 1024)
+
+    def cleanTempFiles(self, force=False, background=False):
         if force or (not self.debug and len(self.output["errors"]) == 0):
-            if path.isdir(self.working_folder):
-                rmtree(self.working_folder)
             print()
-            print("Cleaned up working directory!")
+            if background:
+                # Nothing needs the working folder anymore, so delete it while
+                # the summary is printed; Python waits for the thread to finish
+                # before exiting
+                Thread(target=self.removeWorkingFolder).start()
+                print("Cleaning up working directory in the background...")
+            else:
+                if path.isdir(self.working_folder):
+                    rmtree(self.working_folder)
+                print("Cleaned up working directory!")
+
+    def removeWorkingFolder(self):
+        # An exception in a thread would only be dumped as a traceback after the
+        # summary, so report a failed cleanup, e.g. a locked file, plainly
+        try:
+            rmtree(self.working_folder)
+        except OSError as error:
+            print(
+                f"Could not clean up working directory {self.working_folder}: {error}"
+            )
 
-    def unzipFile(self, file_path):
+    def unzipFile(self, index, file_path):
         basename = path.splitext(path.basename(file_path))[0]
-        unzipPath = path.join(self.working_folder, basename)
-        unpack_archive(file_path, extract_dir=unzipPath, format="zip")
+        # Backups from different folders can share a file name, and they are
+        # extracted at the same time, so give each input its own folder
+        unzipPath = path.join(self.working_folder, f"{index}-{basename}")
+        with ZipFile(file_path) as jwl_file:
+            jwl_file.extractall(unzipPath)
         return unzipPath
 
     def getFirstDBFile(self, unzipPath):
-        db_files = glob(unzipPath + "/*.db")
-        if db_files:
-            return db_files[0]
-        else:
-            return None
+        return next(iglob(unzipPath + "/*.db"), None)
 
     def getJwlFiles(self):
         file_paths = []
@@ -983,10 +1148,12 @@ class JwlBackupProcessor:
             if args.file:
                 file_paths.extend(args.file)
             if args.folder:
-                for file in listdir(args.folder):
-                    if not file.lower().endswith(".jwlibrary"):
-                        continue
-                    file_paths.append(path.join(args.folder, file))
+                with scandir(args.folder) as entries:
+                    file_paths.extend(
+                        entry.path
+                        for entry in entries
+                        if entry.is_file() and entry.name.lower().endswith(".jwlibrary")
+                    )
         else:
             import tkinter as tk
             from tkinter import filedialog
@@ -1021,22 +1188,21 @@ class JwlBackupProcessor:
         print()
         if path.exists(self.merged_db_path):
             remove(self.merged_db_path)
-        db_paths = []
-        for file_path in tqdm(file_paths, desc="Extracting databases"):
-            db_path = self.getFirstDBFile(self.unzipFile(file_path))
-            copy2(db_path, self.merged_db_path)
-            db_paths.append(db_path)
+        # Archives are independent of one another, and zlib releases the GIL
+        # while inflating, so they can be extracted concurrently
+        with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+            unzip_paths = list(
+                tqdm(
+                    executor.map(self.unzipFile, range(len(file_paths)), file_paths),
+                    total=len(file_paths),
+                    desc="Extracting databases",
+                )
+            )
+        db_paths = [self.getFirstDBFile(unzip_path) for unzip_path in unzip_paths]
+        # Only the last database would survive copying each one in turn
+        copyfile(db_paths[-1], self.merged_db_path)
         return db_paths
 
-    def calculate_sha256(self, file_path):
-        import hashlib
-
-        hash_sha256 = hashlib.sha256()
-        with open(file_path, "rb") as file:
-            for chunk in iter(lambda: file.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
-
 
 if __name__ == "__main__":
     processor = JwlBackupProcessor()